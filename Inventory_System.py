@@ -1,77 +1,392 @@
 import streamlit as st
 import json
 import os
-from rapidfuzz import fuzz
-import hashlib
+import io
 import csv
+import copy
+import threading
+from rapidfuzz import fuzz, process, utils
+import hashlib
+from functools import lru_cache
+from collections import Counter, defaultdict
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+from storage import BUFFER, atomic_write
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib parser
+    orjson = None
 
 # File paths
-PRODUCTS_FILE = "product_prices.json"
+PRODUCTS_FILE = "product_prices.json"  # Legacy JSON store, migrated on first boot
+PRODUCTS_PARQUET = "products.parquet"
 CATEGORIES_FILE = "categories.json"
 DATABASE_FOLDER = "database"
 USERS_FILE = os.path.join(DATABASE_FOLDER, "users.json")
 
 os.makedirs(DATABASE_FOLDER, exist_ok=True)
 
+# Password hashing: BLAKE2b, keyed with INVENTORY_PEPPER when it is set (unkeyed if empty).
+# Changing the pepper invalidates every stored password.
+HASH_SCHEME = "blake2b"
+PEPPER = os.environ.get("INVENTORY_PEPPER", "").encode()
+if len(PEPPER) > hashlib.blake2b.MAX_KEY_SIZE:
+    raise ValueError(
+        f"INVENTORY_PEPPER must be at most {hashlib.blake2b.MAX_KEY_SIZE} bytes, got {len(PEPPER)}."
+    )
+
+# Columnar layout of the products store
+PRODUCT_SCHEMA = pa.schema([
+    ("product_name", pa.string()),
+    ("category", pa.string()),
+    ("purchase_price", pa.int64()),
+    ("dealer_price", pa.int64()),
+    ("selling_price", pa.int64()),
+])
+PRODUCT_FIELDS = PRODUCT_SCHEMA.names[1:]
+USER_FIELDS = [field for field in PRODUCT_FIELDS if field != "purchase_price"]  # Hidden from users
+
+# Column choices on the export pages
+ADMIN_EXPORT_COLUMNS = ["Product Name"] + PRODUCT_FIELDS
+USER_EXPORT_COLUMNS = ["Product Name"] + USER_FIELDS
+EXPORT_SCHEMA = pa.schema(
+    [pa.field("Product Name", pa.string())] + [PRODUCT_SCHEMA.field(name) for name in PRODUCT_FIELDS]
+)
+PAGE_SIZE = 10  # Number of rows per page in the product views
+VIEW_CACHE_ENTRIES = 64  # About two versions of every category view, for admins and users
+FUZZY_SCAN_LIMIT = 10000  # Catalogs up to this size are always searched in full
+FUZZY_CONFIDENCE = 80  # Shortlist matches scoring below this are rechecked against the full catalog
+PRICE_FIELDS = ["purchase_price", "dealer_price", "selling_price"]
+COLUMN_LABELS = {
+    "category": "Category",
+    "purchase_price": "Purchase Price",
+    "dealer_price": "Dealer Price",
+    "selling_price": "Selling Price",
+}
+
+# Export formats: download file name and MIME type
+EXPORT_FORMATS = {
+    "csv": ("products.csv", "text/csv"),
+    "parquet": ("products.parquet", "application/vnd.apache.parquet"),
+    "feather": ("products.feather", "application/vnd.apache.arrow.file"),
+}
+
+def _mtime(file_path):
+    """Return the file's modification time in nanoseconds, or None if missing."""
+    try:
+        return os.stat(file_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+@st.cache_data(show_spinner=False, max_entries=8)  # A couple of versions per JSON file
+def _load_cached(file_path, mtime):
+    """Parse a JSON file; cached until its mtime changes (save_data bumps it)."""
+    with open(file_path, "rb") as file:
+        try:
+            if orjson is not None:
+                return orjson.loads(file.read())
+            return json.load(file)
+        except json.JSONDecodeError:  # orjson.JSONDecodeError subclasses this
+            return {}  # Return an empty dictionary if the file is invalid
+
+def _version(file_path):
+    """Cache key for a file's current contents, including buffered writes."""
+    return _mtime(file_path), BUFFER.revision(file_path)
+
 def load_data(file_path):
-    if os.path.exists(file_path):
-        with open(file_path, "r") as file:
-            try:
-                return json.load(file)
-            except json.JSONDecodeError:
-                return {}  # Return an empty dictionary if the file is invalid
+    pending = BUFFER.get(file_path)
+    if pending is not None:
+        return copy.deepcopy(pending)
+    mtime = _mtime(file_path)
+    if mtime is not None:
+        return _load_cached(file_path, mtime)
     return {}  # Return an empty dictionary if the file doesn't exist
 
 def save_data(data, file_path):
-    with open(file_path, "w") as file:
-        json.dump(data, file, indent=4)
-
-def generate_csv(data, selected_columns, file_name="output.csv"):
-    """Generate a CSV file with selected columns from the data."""
-    if not data:
+    if orjson is not None:
+        payload = orjson.dumps(data)
+    else:
+        payload = json.dumps(data, separators=(",", ":")).encode()
+    atomic_write(file_path, lambda file: file.write(payload))
+
+def dump_pretty(data):
+    """Return indented JSON bytes for human inspection (admin debug export)."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=4).encode()
+
+def migrate_products():
+    """Create the Parquet store from the legacy JSON file on first boot."""
+    if not os.path.exists(PRODUCTS_PARQUET):
+        save_products(load_data(PRODUCTS_FILE))
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _products_frame(version):
+    """All products as a DataFrame indexed by product name, for one version.
+
+    Shared between sessions without copying, so callers must not modify it.
+    """
+    pending = BUFFER.get(PRODUCTS_PARQUET)
+    if isinstance(pending, pd.DataFrame):
+        return pending
+    if pending is not None:
+        return pd.DataFrame.from_dict(pending, orient="index", columns=PRODUCT_FIELDS)
+    return pq.read_table(PRODUCTS_PARQUET).to_pandas().set_index("product_name")
+
+def load_products():
+    """Load all products as a {name: details} dict, for the pages that edit them."""
+    pending = BUFFER.get(PRODUCTS_PARQUET)
+    if isinstance(pending, pd.DataFrame):
+        return pending.to_dict(orient="index")
+    if pending is not None:
+        return dict(pending)  # Edits replace whole records, so a shallow copy is enough
+    return _products_frame(_version(PRODUCTS_PARQUET)).to_dict(orient="index")
+
+def save_products(data, file_path=PRODUCTS_PARQUET):
+    """Write all products, as a dict or a name-indexed frame, to the Parquet store."""
+    if isinstance(data, pd.DataFrame):
+        table = pa.Table.from_pandas(
+            data.rename_axis("product_name").reset_index(), schema=PRODUCT_SCHEMA, preserve_index=False
+        )
+    else:
+        columns = {"product_name": list(data)}
+        for field in PRODUCT_FIELDS:
+            columns[field] = [details[field] for details in data.values()]
+        table = pa.table(columns, schema=PRODUCT_SCHEMA)
+    atomic_write(file_path, lambda file: pq.write_table(table, file, compression="lz4"))
+
+def queue_save(data, file_path, writer=save_data):
+    """Buffer a write of data to file_path until flush_data() runs."""
+    BUFFER.queue(data, file_path, writer)
+
+def has_pending_writes():
+    return bool(BUFFER)
+
+def flush_data():
+    """Write every buffered change to disk."""
+    BUFFER.flush()
+
+def generate_csv(products, selected_columns, file_format="csv"):
+    """Return CSV, Parquet or Feather bytes with selected columns from a products frame."""
+    if products.empty:
         return None
 
-    file_path = os.path.join(DATABASE_FOLDER, file_name)
-    with open(file_path, "w", newline="") as csvfile:
-        writer = csv.writer(csvfile)
-        # Write the header
-        writer.writerow(selected_columns)
-        # Write the rows
-        for product, details in data.items():
-            row = [details.get(col, product if col == "Product Name" else "") for col in selected_columns]
-            writer.writerow(row)
-    return file_path
+    products = products.rename_axis("Product Name").reset_index()
+    if not hasattr(pa_csv, "write_csv"):  # pyarrow < 4.0 has no CSV writer
+        return _generate_with_pandas(products, selected_columns, file_format)
+
+    table = pa.Table.from_pandas(
+        products, schema=EXPORT_SCHEMA, preserve_index=False
+    ).select(selected_columns)
+    sink = pa.BufferOutputStream()
+    if file_format == "parquet":
+        pq.write_table(table, sink, compression="lz4")
+    elif file_format == "feather":
+        feather.write_feather(table, sink, compression="lz4")
+    else:
+        pa_csv.write_csv(table, sink)
+    return sink.getvalue().to_pybytes()
+
+def _generate_with_pandas(products, selected_columns, file_format):
+    """generate_csv for older pyarrow; CSV quoting matches pyarrow's writer."""
+    buffer = io.BytesIO()
+    df = products.reindex(columns=selected_columns, fill_value="")
+    if file_format == "parquet":
+        df.to_parquet(buffer, compression="lz4", index=False)
+    elif file_format == "feather":
+        df.to_feather(buffer, compression="lz4")
+    else:
+        df.to_csv(buffer, index=False, quoting=csv.QUOTE_NONNUMERIC)  # Quote strings, like pyarrow
+    return buffer.getvalue()
+
+def _trigrams(text):
+    """Return the set of 3-character substrings of the normalised text."""
+    text = utils.default_process(text)
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _name_index(version):
+    """Product names, a trigram -> names index, too-short names and catalog positions."""
+    names = _products_frame(version).index.tolist()
+    trigrams = defaultdict(set)
+    short_names = []  # Fewer than two trigrams, so they could never pass the shortlist
+    for name in names:
+        grams = _trigrams(name)
+        if len(grams) < 2:
+            short_names.append(name)
+        for gram in grams:
+            trigrams[gram].add(name)
+    positions = {name: i for i, name in enumerate(names)}
+    return names, dict(trigrams), short_names, positions
+
+def _fuzzy_candidates(query, trigrams, short_names, positions):
+    """Shortlist names sharing at least two trigrams with the query, plus short names."""
+    query_grams = _trigrams(query)
+    counts = Counter()
+    for gram in query_grams:
+        counts.update(trigrams.get(gram, ()))
+    min_shared = min(2, len(query_grams))
+    shortlist = {name for name, shared in counts.items() if shared >= min_shared}
+    shortlist.update(short_names)
+    return sorted(shortlist, key=positions.__getitem__)  # Catalog order, like a full scan
+
+def match_product(query, version):
+    """Return the best (name, score) match scoring at least 50, or None.
+
+    Exact for catalogs up to FUZZY_SCAN_LIMIT products. Larger catalogs are
+    searched through the trigram shortlist first, which is approximate: a name
+    sharing few trigrams with the query can still win a tie with a confident
+    shortlist match.
+    """
+    names, trigrams, short_names, positions = _name_index(version)
+    options = {
+        "scorer": fuzz.token_set_ratio,
+        "processor": utils.default_process,
+        "score_cutoff": 50,  # Threshold for similarity
+    }
+    if len(names) > FUZZY_SCAN_LIMIT and len(_trigrams(query)) >= 2:
+        match = process.extractOne(query, _fuzzy_candidates(query, trigrams, short_names, positions), **options)
+        if match is not None and match[1] >= FUZZY_CONFIDENCE:
+            return match[:2]
+    # Small catalog, a too-short query or a weak shortlist match: scan everything
+    match = process.extractOne(query, names, **options)
+    return match[:2] if match else None
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _by_category(version):
+    """Map each category to its {name: details} products for one version.
+
+    Shared between sessions without copying, so callers must not modify it.
+    """
+    frame = _products_frame(version)
+    return {
+        category: group.to_dict(orient="index")
+        for category, group in frame.groupby("category", sort=False)
+    }
+
+def _category_frame(version, category):
+    """Slice of the cached products frame for one category, or all of it for "All"."""
+    frame = _products_frame(version)
+    if category == "All":
+        return frame
+    return frame[frame["category"] == category]
+
+@st.cache_data(show_spinner=False, max_entries=VIEW_CACHE_ENTRIES)
+def _products_df(category, version, admin):
+    """Build the product table for a category view and its page count."""
+    frame = _category_frame(version, category)
+    if frame.empty:
+        return None, 0
+
+    cols = PRODUCT_FIELDS if admin else USER_FIELDS
+    df = frame[cols].astype({"category": "category"})  # Categories repeat heavily
+    # Shrink each price column to the smallest integer type that holds its values
+    df = df.assign(**{
+        col: pd.to_numeric(df[col], downcast="integer") for col in cols if col in PRICE_FIELDS
+    })
+    df = df.rename(columns=COLUMN_LABELS).rename_axis("Product Name").reset_index()
+    total_pages = -(-len(df) // PAGE_SIZE)  # Ceiling division
+    return df, total_pages
 
 def hash_password(password):
-    """Hash a password using SHA-256."""
+    """Hash a password using BLAKE2b, keyed with the pepper."""
+    return hashlib.blake2b(password.encode(), digest_size=32, key=PEPPER).hexdigest()
+
+def _legacy_hash_password(password):
+    """Hash a password the old way (plain SHA-256), for migrating users."""
     return hashlib.sha256(password.encode()).hexdigest()
 
+class UserStore:
+    """In-memory copy of the users file, rewritten only when a user changes."""
+
+    def __init__(self, file_path=USERS_FILE):
+        self._file_path = file_path
+        self._lock = threading.Lock()
+        self._memo = lru_cache(maxsize=512)(self._lookup)  # Hashes only; never plaintext
+        self._load()
+
+    def _load(self):
+        users = load_data(self._file_path)
+        self._users = users if isinstance(users, dict) else {}  # Ensure users is a dictionary
+        self._mtime = _mtime(self._file_path)
+
+    def _refresh(self):
+        """Reload if the file was changed outside this store (a stat, no parse)."""
+        if _mtime(self._file_path) != self._mtime:
+            with self._lock:
+                self._load()
+            self._memo.cache_clear()
+
+    def get(self, username):
+        self._refresh()
+        return self._users.get(username)
+
+    def check(self, username, password_hash):
+        """Return the user if the BLAKE2b password hash matches, else None."""
+        self._refresh()
+        return self._memo(username, password_hash)
+
+    def _lookup(self, username, password_hash):
+        user = self._users.get(username)
+        if user and user.get("scheme") == HASH_SCHEME and user["password"] == password_hash:
+            return dict(user)
+        return None
+
+    def add(self, username, password_hash, role):
+        """Add a user; returns False if the username is taken."""
+        with self._lock:
+            if username in self._users:
+                return False
+            self._users[username] = {"password": password_hash, "role": role, "scheme": HASH_SCHEME}
+            self._save()
+        return True
+
+    def set_password(self, username, password_hash):
+        with self._lock:
+            self._users[username].update(password=password_hash, scheme=HASH_SCHEME)
+            self._save()
+
+    def _save(self):
+        save_data(self._users, self._file_path)
+        self._mtime = _mtime(self._file_path)
+        self._memo.cache_clear()
+
+@st.cache_resource(show_spinner=False)
+def get_user_store():
+    """Process-wide UserStore shared by every session."""
+    return UserStore()
+
+def _upgrade_legacy_user(username, password):
+    """Check a SHA-256 user record and rehash it with BLAKE2b on success."""
+    store = get_user_store()
+    user = store.get(username)
+    if user and "scheme" not in user and user["password"] == _legacy_hash_password(password):
+        store.set_password(username, hash_password(password))
+        return dict(store.get(username))
+    return None
+
 def authenticate_user(username, password):
     """Authenticate user credentials."""
-    users = load_data(USERS_FILE)
-    hashed_password = hash_password(password)
-    user = users.get(username)
-    if user and user["password"] == hashed_password:
-        return user
-    return None
+    return get_user_store().check(username, hash_password(password)) or _upgrade_legacy_user(username, password)
 
 def create_default_admin():
-    """Create a default admin user if not exists."""
-    users = load_data(USERS_FILE)
-    if not isinstance(users, dict):  # Ensure users is a dictionary
-        users = {}
-    if "Admin" not in users:
-        users["Admin"] = {"password": hash_password("1234"), "role": "Admin"}
-        save_data(users, USERS_FILE)
+    """Create a default admin user if not exists.
+
+    Users created before BLAKE2b hashing have no "scheme" field; they are
+    rehashed the first time they log in (see _upgrade_legacy_user).
+    """
+    store = get_user_store()
+    if store.get("Admin") is None:
+        store.add("Admin", hash_password("1234"), "Admin")
 
 def signup(username, password, role):
     """Sign up a new user."""
-    users = load_data(USERS_FILE)
-    if username in users:
+    if not get_user_store().add(username, hash_password(password), role):
         return False, "Username already exists!"
-    users[username] = {"password": hash_password(password), "role": role}
-    save_data(users, USERS_FILE)
     return True, "User created successfully!"
 
 def format_username(username):
@@ -89,8 +404,17 @@ def create_sidebar():
         </div>
     """, unsafe_allow_html=True)
 
+    # Save button, writes buffered product and category changes to disk
+    if st.session_state.role == "Admin" and st.sidebar.button("Save Changes", width="stretch"):
+        if has_pending_writes():
+            flush_data()
+            st.sidebar.success("Changes saved.")
+        else:
+            st.sidebar.info("No unsaved changes.")
+
     # Logout button
     if st.sidebar.button("Logout", use_container_width=True):
+        flush_data()
         st.session_state.authenticated = False
         st.session_state.username = None
         st.session_state.role = None
@@ -102,7 +426,7 @@ def create_sidebar():
     if st.session_state.role == "Admin":
         menu_choice = st.sidebar.radio(
             "Navigation",
-            ["Add New Product", "Update Product", "View All Products",
+            ["Add New Product", "Update Product", "View All Products", "Query Product Price",
              "Manage Categories", "Generate CSV", "User Management"],
             key="menu_choice",
         )
@@ -117,7 +441,8 @@ def create_sidebar():
     return menu_choice
 
 def main():
-    data = load_data(PRODUCTS_FILE)
+    migrate_products()
+    version = _version(PRODUCTS_PARQUET)
     categories = load_data(CATEGORIES_FILE).get("categories", [])
     # Ensure default admin exists
     create_default_admin()
@@ -147,20 +472,46 @@ def main():
         st.title("Product Price Management System")
         main_menu_choice = create_sidebar()  # Get the selected menu choice from sidebar
 
-        if main_menu_choice == "Query Product Price":
+        if main_menu_choice == "Query Product Price" and st.session_state.role == "Admin":
             st.header("Query")
             query_input = st.text_input("Enter Product or Category").strip()
 
             if st.button("Search"):
+                data = load_products()
                 if not data:
                     st.warning("No products found. Please add some products first.")
+                elif "," in query_input:
+                    # Batch lookup: score every query against every product in one call
+                    queries = [query.strip() for query in query_input.split(",") if query.strip()]
+                    if not queries:
+                        st.warning("Please enter at least one product name between the commas.")
+                    else:
+                        names = _name_index(version)[0]
+                        scores = process.cdist(
+                            queries,
+                            names,
+                            scorer=fuzz.token_set_ratio,
+                            processor=utils.default_process,
+                            score_cutoff=50,  # Scores below the threshold come back as 0
+                            workers=-1,
+                        )
+                        for query, row in zip(queries, scores):
+                            best_idx = int(row.argmax())
+                            if row[best_idx]:
+                                best_match = names[best_idx]
+                                product = data[best_match]
+                                st.write(
+                                    f"{best_match}({int(row[best_idx])}%): {product['purchase_price']}/{product['selling_price']}"
+                                )
+                            else:
+                                st.warning(f"No matching product found for '{query}'.")
                 else:
                     # Check if input matches a category
-                    category_matches = {
-                        name: details
-                        for name, details in data.items()
-                        if details["category"].lower() == query_input.lower()
-                    }
+                    category_matches = next(
+                        (products for category, products in _by_category(version).items()
+                         if category.lower() == query_input.lower()),
+                        {},
+                    )
 
                     if category_matches:
                         query_input = query_input.upper()
@@ -171,15 +522,10 @@ def main():
                             )
                     else:
                         # Check for product name similarity
-                        matches = []
-                        for product_name in data.keys():
-                            similarity_score = fuzz.token_set_ratio(query_input, product_name)
-                            if similarity_score >= 50:  # Threshold for similarity
-                                matches.append((product_name, similarity_score))
-
-                        if matches:
-                            matches.sort(key=lambda x: x[1], reverse=True)
-                            best_match, score = matches[0]
+                        match = match_product(query_input, version)
+
+                        if match:
+                            best_match, score = match
                             product = data[best_match]
                             score = int(score)
                             st.write(
@@ -207,33 +553,40 @@ def main():
             # Select category filter
             selected_category = st.selectbox("Filter by Category", options=["All"] + categories)
 
-            # Filter data by category
-            if selected_category == "All":
-                filtered_data = data
-            else:
-                filtered_data = {name: details for name, details in data.items() if details["category"] == selected_category}
+            # Filter products by category; the export itself is only built on click
+            products = _category_frame(version, selected_category)
 
-            if filtered_data:
+            if not products.empty:
                 # Select columns to include
-                all_columns = ["Product Name"] + list(next(iter(data.values())).keys())
-                selected_columns = st.multiselect("Select Columns to Include in CSV", options=all_columns, default=all_columns)
+                selected_columns = st.multiselect("Select Columns to Include in CSV", options=ADMIN_EXPORT_COLUMNS, default=ADMIN_EXPORT_COLUMNS)
+                file_format = st.radio("Format", list(EXPORT_FORMATS), horizontal=True)
 
                 if st.button("Generate CSV"):
                     if selected_columns:
-                        file_path = generate_csv(filtered_data, selected_columns)
-                        if file_path:
-                            with open(file_path, "rb") as file:
-                                st.download_button(
-                                    label="Download CSV File",
-                                    data=file,
-                                    file_name="products.csv",
-                                    mime="text/csv"
-                                )
-                            st.success("CSV file generated successfully!")
+                        file_bytes = generate_csv(products, selected_columns, file_format)
+                        if file_bytes:
+                            file_name, mime = EXPORT_FORMATS[file_format]
+                            st.download_button(
+                                label=f"Download {file_format.upper()} File",
+                                data=file_bytes,
+                                file_name=file_name,
+                                mime=mime
+                            )
+                            st.success(f"{file_format.upper()} file generated successfully!")
                         else:
                             st.error("Failed to generate CSV file.")
                     else:
                         st.error("Please select at least one column to include in the CSV.")
+
+                with st.expander("Debug"):
+                    # Serialize only on request; this page reruns on every widget change
+                    if st.button("Prepare JSON Export"):
+                        st.download_button(
+                            label="Download Products as Indented JSON",
+                            data=dump_pretty(products.to_dict(orient="index")),
+                            file_name="products.json",
+                            mime="application/json"
+                        )
             else:
                 st.info("No products available for the selected category.")
 
@@ -243,32 +596,26 @@ def main():
             # Select category filter
             selected_category = st.selectbox("Filter by Category", options=["All"] + categories)
 
-            # Filter data by category
-            if selected_category == "All":
-                filtered_data = data
-            else:
-                filtered_data = {name: details for name, details in data.items() if details["category"] == selected_category}
+            # Filter products by category; the export itself is only built on click
+            products = _category_frame(version, selected_category)
 
-            if filtered_data:
+            if not products.empty:
                 # Select columns to include, excluding "purchase price"
-                all_columns = ["Product Name"] + [
-                    column for column in list(next(iter(data.values())).keys())
-                    if column != "purchase_price"
-                ]
-                selected_columns = st.multiselect("Select Columns to Include in CSV", options=all_columns, default=all_columns)
+                selected_columns = st.multiselect("Select Columns to Include in CSV", options=USER_EXPORT_COLUMNS, default=USER_EXPORT_COLUMNS)
+                file_format = st.radio("Format", list(EXPORT_FORMATS), horizontal=True)
 
                 if st.button("Generate CSV"):
                     if selected_columns:
-                        file_path = generate_csv(filtered_data, selected_columns)
-                        if file_path:
-                            with open(file_path, "rb") as file:
-                                st.download_button(
-                                    label="Download CSV File",
-                                    data=file,
-                                    file_name="products.csv",
-                                    mime="text/csv"
-                                )
-                            st.success("CSV file generated successfully!")
+                        file_bytes = generate_csv(products, selected_columns, file_format)
+                        if file_bytes:
+                            file_name, mime = EXPORT_FORMATS[file_format]
+                            st.download_button(
+                                label=f"Download {file_format.upper()} File",
+                                data=file_bytes,
+                                file_name=file_name,
+                                mime=mime
+                            )
+                            st.success(f"{file_format.upper()} file generated successfully!")
                         else:
                             st.error("Failed to generate CSV file.")
                     else:
@@ -286,13 +633,14 @@ def main():
 
             if st.button("Add Product"):
                 if product_name and category != "Select a Category" and purchase_price > 0 and selling_price > 0 and dealer_price > 0:
+                    data = load_products()
                     data[product_name] = {
                         "category": category,
                         "purchase_price": purchase_price,
                         "dealer_price": dealer_price,
                         "selling_price": selling_price,
                     }
-                    save_data(data, PRODUCTS_FILE)
+                    queue_save(data, PRODUCTS_PARQUET, save_products)
                     st.success(f"Product '{product_name}' added successfully!")
                 else:
                     st.error("Please enter valid details and select a category.")
@@ -302,25 +650,26 @@ def main():
             selected_category = st.selectbox("Select a Category", options=categories)
 
             if selected_category:
-                products_in_category = {name: details for name, details in data.items() if details["category"] == selected_category}
+                products_in_category = _by_category(version).get(selected_category, {})
 
                 if products_in_category:
                     selected_product = st.selectbox("Select a Product to Edit", options=list(products_in_category.keys()))
 
                     if selected_product:
-                        new_category = st.text_input("New Category", value=data[selected_product]["category"])
-                        new_purchase_price = st.number_input("New Purchase Price", min_value=0, value=data[selected_product]["purchase_price"], step=1)
-                        new_dealer_price = st.number_input("New dealer Price", min_value=0, value=data[selected_product]["dealer_price"], step=1)
-                        new_selling_price = st.number_input("New Selling Price", min_value=0, value=data[selected_product]["selling_price"], step=1)
+                        new_category = st.text_input("New Category", value=products_in_category[selected_product]["category"])
+                        new_purchase_price = st.number_input("New Purchase Price", min_value=0, value=products_in_category[selected_product]["purchase_price"], step=1)
+                        new_dealer_price = st.number_input("New dealer Price", min_value=0, value=products_in_category[selected_product]["dealer_price"], step=1)
+                        new_selling_price = st.number_input("New Selling Price", min_value=0, value=products_in_category[selected_product]["selling_price"], step=1)
 
                         if st.button("Update Product"):
+                            data = load_products()
                             data[selected_product] = {
                                 "category": new_category,
                                 "purchase_price": new_purchase_price,
                                 "dealer_price": new_dealer_price,
                                 "selling_price": new_selling_price,
                             }
-                            save_data(data, PRODUCTS_FILE)
+                            queue_save(data, PRODUCTS_PARQUET, save_products)
                             st.success(f"Product '{selected_product}' has been updated!")
                 else:
                     st.warning("No products found in the selected category.")
@@ -329,31 +678,10 @@ def main():
             st.header("All Products")
             selected_category = st.selectbox("Filter by Category", options=["All"] + categories)
 
-            # Filter the data based on selected category
-            if selected_category == "All":
-                filtered_data = data
-            else:
-                filtered_data = {name: details for name, details in data.items() if details["category"] == selected_category}
-
-            # Convert the filtered data into a DataFrame
-            if filtered_data:
-                product_list = []
-                for product_name, details in filtered_data.items():
-                    product_info = {
-                        "Product Name": product_name,
-                        "Category": details["category"],
-                        "Purchase Price": details["purchase_price"],
-                        "Dealer Price": details["dealer_price"],
-                        "Selling Price": details["selling_price"]
-                    }
-                    product_list.append(product_info)
-
-                df = pd.DataFrame(product_list)
-
-                # Pagination Implementation
-                page_size = 10  # Number of rows per page
-                total_pages = len(df) // page_size + (1 if len(df) % page_size > 0 else 0)
+            # Build (or reuse) the table for the selected category
+            df, total_pages = _products_df(selected_category, version, admin=True)
 
+            if total_pages:
                 # If there's more than 1 page, show the slider; otherwise, skip it
                 if total_pages > 1:
                     current_page = st.slider("Page", 1, total_pages, 1)
@@ -361,12 +689,12 @@ def main():
                     current_page = 1  # Only one page, set it to 1
 
                 # Slice the DataFrame to get the rows for the current page
-                start_idx = (current_page - 1) * page_size
-                end_idx = start_idx + page_size
+                start_idx = (current_page - 1) * PAGE_SIZE
+                end_idx = start_idx + PAGE_SIZE
                 page_df = df.iloc[start_idx:end_idx]
 
                 # Display the paginated table
-                st.dataframe(page_df)
+                st.dataframe(page_df, width="stretch")
             else:
                 st.info("No products found for the selected category.")
         
@@ -374,30 +702,10 @@ def main():
             st.header("All Products")
             selected_category = st.selectbox("Filter by Category", options=["All"] + categories)
 
-            # Filter the data based on selected category
-            if selected_category == "All":
-                filtered_data = data
-            else:
-                filtered_data = {name: details for name, details in data.items() if details["category"] == selected_category}
-
-            # Convert the filtered data into a DataFrame
-            if filtered_data:
-                product_list = []
-                for product_name, details in filtered_data.items():
-                    product_info = {
-                        "Product Name": product_name,
-                        "Category": details["category"],
-                        "Dealer Price": details["dealer_price"],
-                        "Selling Price": details["selling_price"]
-                    }
-                    product_list.append(product_info)
-
-                df = pd.DataFrame(product_list)
-
-                # Pagination Implementation
-                page_size = 10  # Number of rows per page
-                total_pages = len(df) // page_size + (1 if len(df) % page_size > 0 else 0)
+            # Build (or reuse) the table for the selected category
+            df, total_pages = _products_df(selected_category, version, admin=False)
 
+            if total_pages:
                 # If there's more than 1 page, show the slider; otherwise, skip it
                 if total_pages > 1:
                     current_page = st.slider("Page", 1, total_pages, 1)
@@ -405,12 +713,12 @@ def main():
                     current_page = 1  # Only one page, set it to 1
 
                 # Slice the DataFrame to get the rows for the current page
-                start_idx = (current_page - 1) * page_size
-                end_idx = start_idx + page_size
+                start_idx = (current_page - 1) * PAGE_SIZE
+                end_idx = start_idx + PAGE_SIZE
                 page_df = df.iloc[start_idx:end_idx]
 
                 # Display the paginated table
-                st.dataframe(page_df)
+                st.dataframe(page_df, width="stretch")
             else:
                 st.info("No products found for the selected category.")
         
@@ -420,7 +728,7 @@ def main():
             if st.button("Add Category"):
                 if new_category and new_category not in categories:
                     categories.append(new_category)
-                    save_data({"categories": categories}, CATEGORIES_FILE)
+                    queue_save({"categories": categories}, CATEGORIES_FILE)
                     st.success(f"Category '{new_category}' added successfully!")
                 elif new_category in categories:
                     st.warning("Category already exists!")
@@ -432,9 +740,10 @@ def main():
                 if st.button("Delete Category"):
                     if selected_category in categories:
                         categories.remove(selected_category)
-                        data = {k: v for k, v in data.items() if v["category"] != selected_category}
-                        save_data(data, PRODUCTS_FILE)
-                        save_data({"categories": categories}, CATEGORIES_FILE)
+                        frame = _products_frame(version)
+                        names = frame.index[frame["category"] == selected_category]
+                        queue_save(frame.drop(names), PRODUCTS_PARQUET, save_products)  # A new frame, the cached one is untouched
+                        queue_save({"categories": categories}, CATEGORIES_FILE)
                         st.success(f"Category '{selected_category}' deleted successfully!")
                     else:
                         st.error("Selected category not found!")
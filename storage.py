@@ -0,0 +1,74 @@
+"""Write buffering and atomic file writes for Inventory_System.py.
+
+Streamlit re-executes the entry script on every rerun, but imports this module
+only once per process, so buffered writes here survive reruns and cache clears.
+"""
+import atexit
+import itertools
+import os
+import stat
+import tempfile
+import threading
+import time
+
+# os.umask() can only be read by setting it, so read it once at import
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def _mtime(file_path):
+    try:
+        return os.stat(file_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def atomic_write(file_path, write):
+    """Call write(file) on a private temp file, then move it over file_path."""
+    try:
+        mode = stat.S_IMODE(os.stat(file_path).st_mode)  # Keep the existing permissions
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK  # What a plain open() would have created
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            write(file)
+        os.chmod(tmp_path, mode)  # mkstemp creates the file as 0600
+        os.replace(tmp_path, file_path)  # Atomic, so readers never see a partial file
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+class WriteBuffer:
+    """Writes held in memory until flush(), shared by every session and rerun."""
+
+    def __init__(self):
+        self._pending = {}  # {file_path: (writer, data, revision, queued_at)}
+        self._lock = threading.RLock()
+        self._revisions = itertools.count(1)
+
+    def get(self, file_path):
+        """Return the buffered data for file_path, or None if nothing is queued."""
+        pending = self._pending.get(file_path)
+        return pending[1] if pending else None
+
+    def revision(self, file_path):
+        pending = self._pending.get(file_path)
+        return pending[2] if pending else None
+
+    def queue(self, data, file_path, writer):
+        with self._lock:
+            self._pending[file_path] = (writer, data, next(self._revisions), time.time_ns())
+
+    def __bool__(self):
+        return bool(self._pending)
+
+    def flush(self):
+        """Write every buffered change to disk, skipping files saved since they were queued."""
+        with self._lock:
+            for file_path, (writer, data, _, queued_at) in list(self._pending.items()):
+                mtime = _mtime(file_path)
+                if mtime is None or mtime <= queued_at:  # Never overwrite a newer save
+                    writer(data, file_path)
+                del self._pending[file_path]
+
+BUFFER = WriteBuffer()
+atexit.register(BUFFER.flush)